@@ -1,25 +1,29 @@
 import asyncio
+import math
 import os
+import random
+import socket
 from collections import defaultdict
-import re
-from typing import Any, Dict, Optional, List
+import sys
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, List, Set, Tuple
 from urllib.parse import urljoin
 
+import aiofiles
 import httpx
+import orjson
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.progress import Progress
 import xlsxwriter
 from datetime import datetime
 import gspread
+from gspread.utils import absolute_range_name
 from google.oauth2.service_account import Credentials
-from textual.widgets import data_table
 from zoneinfo import ZoneInfo
 
 load_dotenv()
 
 # Globals runtime
-JWT: str = ""
 console = Console()
 error_console = Console(stderr=True, style="bold red")
 
@@ -28,17 +32,26 @@ ELECTION_ID = os.getenv("ELECTION_ID")
 BASE_API_URL = os.getenv("BASE_API_URL", "")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
+# Resolved once, the per-item endpoints below are plain string concatenation
+ELECTION_ROUND_URL = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}")
 # ----------------------------------------------------------------------------------
 
 # Tunables
 DOWNLOAD_ATTACHMENTS = os.getenv("DOWNLOAD_ATTACHMENTS", "").lower() == "true"
 CONCURRENT_WORKERS = int(os.getenv("CONCURRENT_WORKERS", "8"))
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "100"))  # items requested per listing page
+PAGE_PREFETCH = 4  # pages kept in flight when the API does not report totals
 HTTP_TIMEOUT_SECONDS = None  # unlimited; set number if desired
+HTTP_RETRIES = 3  # extra attempts for connection errors, 429 and 5xx responses
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # bytes buffered per in-flight attachment download
+HTTP_KEEPALIVE_SECONDS = 60.0  # idle pooled connections are kept this long between phases
 # ----------------------------------------------------------------------------------
 
 # Paths
 EXPORT_ROOT = os.path.join("exported-data", ELECTION_ID)
 os.makedirs(EXPORT_ROOT, exist_ok=True)
+SUBMISSION_ATTACHMENTS_DIR = os.path.abspath(os.path.join(EXPORT_ROOT, "submission-attachments"))
+QUICK_REPORT_ATTACHMENTS_DIR = os.path.abspath(os.path.join(EXPORT_ROOT, "quick-report-attachments"))
 # ----------------------------------------------------------------------------------
 
 # Google
@@ -46,479 +59,788 @@ GOOGLE_CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "")
 FS_GOOGLE_DOC_ID = os.getenv("FS_GOOGLE_DOC_ID", "")
 QR_GOOGLE_DOC_ID = os.getenv("QR_GOOGLE_DOC_ID", "")
 scopes = ['https://www.googleapis.com/auth/spreadsheets']
-credentials = Credentials.from_service_account_file(GOOGLE_CREDENTIALS_PATH, scopes=scopes)
-gdocs_client = gspread.authorize(credentials)
 
 ZONE_INFO = ZoneInfo(os.getenv("ZONE_INFO", "Etc/UTC"))
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 # ----------------------------------------------------------------------------------
 
 # ---------------------------
 # Utilities
 # ---------------------------
+INVALID_SHEET_NAME_CHARS = str.maketrans('', '', '[]:*?/\\')
+
+
 def clean_sheet_name(name: str) -> str:
     # Remove invalid characters
-    name = re.sub(r'[\[\]\:\*\?\/\\]', '', name)
+    name = name.translate(INVALID_SHEET_NAME_CHARS)
     # Trim to max length (31)
     return name[:31].strip()
 
 
+def _fromisoformat_accepts_z() -> bool:
+    # Python 3.11+ parses a trailing "Z" directly; older versions need it rewritten
+    try:
+        datetime.fromisoformat("2024-01-01T00:00:00Z")
+        return True
+    except ValueError:
+        return False
+
+
+if _fromisoformat_accepts_z():
+    parse_utc_timestamp = datetime.fromisoformat
+else:
+    def parse_utc_timestamp(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def to_cell_strings(row: List[Any]) -> List[str]:
+    # Every cell is exported as text; most already are, so only the rest go through str()
+    return [cell if cell.__class__ is str else str(cell or "") for cell in row]
+
+
+def list_exported_files() -> Set[str]:
+    # One walk of the export folder instead of a stat call per attachment
+    export_root = os.path.abspath(EXPORT_ROOT)
+    return {os.path.join(root, name) for root, _, files in os.walk(export_root) for name in files}
+
+
 def local_submission_attachment_path(attachment: Dict[str, Any]) -> str:
-    return os.path.abspath(os.path.join(EXPORT_ROOT, 'submission-attachments', attachment["uploadedFileName"]))
+    return os.path.join(SUBMISSION_ATTACHMENTS_DIR, attachment["uploadedFileName"])
 
 
 def local_quick_report_attachment_path(attachment: Dict[str, Any]) -> str:
-    return os.path.abspath(
-        os.path.join(EXPORT_ROOT, f"quick-report-attachments", attachment["uploadedFileName"]))
+    return os.path.join(QUICK_REPORT_ATTACHMENTS_DIR, attachment["uploadedFileName"])
 
 
 # ---------------------------
 # Fetch and download helpers
 # ---------------------------
-async def fetch_json(client: httpx.AsyncClient, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    resp = await client.get(url, params=params)
-    resp.raise_for_status()
-    return resp.json()
-
-
-async def download_binary(url: str, target_path):
-    if os.path.exists(target_path):
-        return
-
-    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+async def run_worker_pool(items: Iterable[Any], handle: Callable[[Any], Awaitable[None]]) -> None:
+    # A fixed pool of CONCURRENT_WORKERS coroutines drains a queue of work items,
+    # instead of one task per item all waiting on a semaphore
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def worker() -> None:
+        while not queue.empty():
+            await handle(queue.get_nowait())
+
+    workers = [asyncio.create_task(worker()) for _ in range(CONCURRENT_WORKERS)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        # One failure stops the pool, the other workers must not keep sending requests
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
 
-    if not os.path.exists(target_path):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=None)
-            response.raise_for_status()  # Raise error if request failed
 
-            # Write content to file
-            with open(target_path, "wb") as f:
-                f.write(response.content)
+async def fetch_json(client: httpx.AsyncClient, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            resp = await client.get(url, params=params)
+            resp.raise_for_status()
+            return orjson.loads(resp.content)
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            # Connection problems, throttling and 5xx are worth another try, other 4xx are not
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            retryable = status is None or status == 429 or status >= 500
+            if attempt == HTTP_RETRIES or not retryable:
+                raise
+            # Jittered, so workers that failed together do not all retry in the same instant
+            delay = 0.5 * 2 ** attempt * random.uniform(0.5, 1.5)
+            if status == 429:
+                # Back off for at least as long as the server asks to
+                retry_after = e.response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+
+
+async def download_binary(client: httpx.AsyncClient, url: str, target_path):
+    # target directories are created up front by main
+    # Download next to the target and rename when complete, so an interrupted
+    # download is never mistaken for an existing file on the next run
+    partial_path = f"{target_path}.part"
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()  # Raise error if request failed
+
+        # Write content to file as it arrives
+        async with aiofiles.open(partial_path, "wb") as f:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+
+    os.replace(partial_path, target_path)
 
 
 # ---------------------------
 # Auth
 # ---------------------------
 async def log_in(client: httpx.AsyncClient) -> None:
-    global JWT
     url = urljoin(BASE_API_URL, "/api/auth/login")
     data = {"email": os.getenv("ADMIN_EMAIL") or ADMIN_EMAIL, "password": os.getenv("ADMIN_PASSWORD") or ADMIN_PASSWORD}
     resp = await client.post(url, json=data)
     resp.raise_for_status()
-    JWT = resp.json().get("token")
+    token = orjson.loads(resp.content).get("token")
     # Attach token header to client for reuse
-    client.headers.update({"Authorization": f"Bearer {JWT}"})
+    client.headers.update({"Authorization": f"Bearer {token}"})
 
 
 # ---------------------------
 # Download full objects & attachments
 # ---------------------------
-async def fetch_submission_detail(client: httpx.AsyncClient, submission_id: str, sem: asyncio.Semaphore, progress,
+async def fetch_submission_detail(client: httpx.AsyncClient, submission_id: str, progress,
                                   task) -> Dict[str, Any]:
-    url = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}/form-submissions/{submission_id}:v2")
+    url = f"{ELECTION_ROUND_URL}/form-submissions/{submission_id}:v2"
 
-    async with sem:
-        try:
-            submission = await fetch_json(client, url)
-            progress.update(task, advance=1)
-            return submission
-        except Exception as e:
-            error_console.log(f"Failed to download submission {submission_id}: {e}")
+    try:
+        submission = await fetch_json(client, url)
+        progress.update(task, advance=1)
+        return submission
+    except Exception as e:
+        error_console.log(f"Failed to download submission {submission_id}: {e}")
+
+
+async def stream_submissions_to_sheets(client: httpx.AsyncClient, submission_ids: List[str], progress,
+                                      task_submissions, task_forms):
+    # Submission details are flattened into their form's rows as they arrive, so the full
+    # payloads are never held all at once. Only the attachments are kept, for downloading.
+    # The forms listing and each listed form's details are fetched alongside the
+    # submissions; submissions to forms missing from the listing (drafted) are dropped.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=CONCURRENT_WORKERS * 2)
+    # one task per listed form, in listing order
+    form_sheet_tasks: Dict[str, asyncio.Task] = {}
+    # keyed by uploadedFileName, a file shared by several submissions is downloaded once
+    attachments: Dict[str, Dict[str, Any]] = {}
+
+    # Details arrive in completion order; each keeps its listing position so that rows
+    # with the same timeSubmitted are ordered the same way on every run
+    async def produce(item: Tuple[int, str]) -> None:
+        index, submission_id = item
+        submission = await fetch_submission_detail(client, submission_id, progress, task_submissions)
+        if submission:
+            await queue.put((index, submission))
+
+    async def produce_all() -> None:
+        await run_worker_pool(enumerate(submission_ids), produce)
+        await queue.put(None)
+
+    async def load_form_sheet(form_id: str) -> Dict[str, Any]:
+        return form_to_sheet(await fetch_form_detail(client, form_id, progress, task_forms))
+
+    async def load_forms() -> None:
+        for form in await fetch_all_forms(client):
+            if form["id"] not in form_sheet_tasks:
+                form_sheet_tasks[form["id"]] = asyncio.create_task(load_form_sheet(form["id"]))
+        progress.update(task_forms, total=len(form_sheet_tasks))
+
+    forms_task = asyncio.create_task(load_forms())
+
+    def add_rows(form_sheet: Dict[str, Any], submissions: List[Tuple[int, Dict[str, Any]]]) -> None:
+        for index, submission in submissions:
+            form_sheet["rows"].append((submission.get("timeSubmitted", ""), index,
+                                       submission_to_row(form_sheet, submission)))
+
+    def add_ready_rows(pending: Dict[str, List[Tuple[int, Dict[str, Any]]]]) -> None:
+        for form_id in list(pending):
+            if form_id not in form_sheet_tasks:
+                # not in the forms listing, e.g. a drafted form
+                del pending[form_id]
+            elif form_sheet_tasks[form_id].done():
+                add_rows(form_sheet_tasks[form_id].result(), pending.pop(form_id))
+
+    async def consume() -> None:
+        # submissions waiting for the forms listing or their form to be fetched
+        pending = defaultdict(list)
+        while (item := await queue.get()) is not None:
+            submission = item[1]
+            for attachment in submission.get("attachments", []):
+                attachments.setdefault(attachment["uploadedFileName"], attachment)
+            form_id = submission.get("formId")
+            if not form_id:
+                continue
+
+            pending[form_id].append(item)
+            if forms_task.done():
+                add_ready_rows(pending)
+
+        await forms_task
+        add_ready_rows(pending)
+        for form_id, submissions in pending.items():
+            add_rows(await form_sheet_tasks[form_id], submissions)
+
+    pipeline = [asyncio.create_task(produce_all()), asyncio.create_task(consume())]
+    try:
+        await asyncio.gather(*pipeline)
+        form_sheets = [await form_sheet_task for form_sheet_task in form_sheet_tasks.values()]
+    except BaseException:
+        # Stop and collect everything still running so no failure is left unretrieved
+        tasks = [*pipeline, forms_task, *form_sheet_tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return form_sheets, list(attachments.values())
 
 
 async def fetch_form_detail(client: httpx.AsyncClient, form_id: str, progress,
                             task) -> Dict[str, Any]:
-    url = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}/forms/{form_id}")
+    url = f"{ELECTION_ROUND_URL}/forms/{form_id}"
     form = await fetch_json(client, url)
     progress.update(task, advance=1)
     return form
 
+async def fetch_quick_report_detail(client: httpx.AsyncClient, quick_report_id: str, progress,
+                                    task) -> Dict[str, Any]:
+    url = f"{ELECTION_ROUND_URL}/quick-reports/{quick_report_id}"
+    try:
+        quick_report = await fetch_json(client, url)
+        progress.update(task, advance=1)
+        return quick_report
+    except Exception as e:
+        error_console.log(f"Failed to download submission {quick_report_id}: {e}")
+
+
+async def stream_quick_reports_to_rows(client: httpx.AsyncClient, progress, task):
+    # The listing pages are handed to the workers as they arrive, so detail fetches
+    # start with the first page instead of after the whole listing. Each detail is
+    # flattened into its row straight away; only rows and attachments are kept.
+    queue: asyncio.Queue = asyncio.Queue()
+    # (timestamp, listing position, row_data) triples, sorted once all quick reports are in.
+    # Details arrive in completion order, the listing position keeps ties in a stable order.
+    rows: List[Tuple[str, Tuple[int, int], List[str]]] = []
+    # keyed by uploadedFileName, a file shared by several quick reports is downloaded once
+    attachments: Dict[str, Dict[str, Any]] = {}
+    listed = 0
+
+    def enqueue_page(page_number: int, items: List[Dict[str, Any]]) -> None:
+        nonlocal listed
+        for offset, quick_report in enumerate(items):
+            queue.put_nowait(((page_number, offset), quick_report["id"]))
+        listed += len(items)
+        progress.update(task, total=listed)
+
+    async def list_all() -> None:
+        try:
+            await fetch_all_quick_reports(client, on_page=enqueue_page)
+        finally:
+            for _ in range(CONCURRENT_WORKERS):
+                queue.put_nowait(None)
+
+    async def worker() -> None:
+        while (item := await queue.get()) is not None:
+            position, quick_report_id = item
+            quick_report = await fetch_quick_report_detail(client, quick_report_id, progress, task)
+            if quick_report:
+                rows.append((quick_report.get("timestamp", ""), position, quick_report_to_row(quick_report)))
+                for attachment in quick_report.get("attachments", []):
+                    attachments.setdefault(attachment["uploadedFileName"], attachment)
+
+    await asyncio.gather(list_all(), *(worker() for _ in range(CONCURRENT_WORKERS)))
+    return rows, list(attachments.values())
+
+
+PageCallback = Callable[[int, List[Dict[str, Any]]], None]
+
+
+async def fetch_all_paginated(client: httpx.AsyncClient, url: str,
+                              on_page: Optional[PageCallback] = None) -> List[Dict[str, Any]]:
+    # on_page, when given, is called with each page's number and items as soon as that page arrives
+    params = {"pageNumber": 1, "pageSize": PAGE_SIZE, "dataSource": "Coalition"}
+
+    # Probe the first page to learn how many pages there are
+    data = await fetch_json(client, url, params=params)
+    items: List[Dict[str, Any]] = list(data.get("items", []))
+    # The API may cap the page size below what was asked for, page by what it actually used
+    page_size = data.get("pageSize") or PAGE_SIZE
+    params["pageSize"] = page_size
+    if on_page:
+        on_page(1, items)
+    if len(items) < page_size:
+        return items
+
+    total_pages = data.get("totalPages")
+    if not total_pages and data.get("totalCount") is not None:
+        total_pages = math.ceil(data["totalCount"] / page_size)
+
+    if total_pages:
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+
+        async def fetch_page(page_number: int) -> None:
+            page = await fetch_json(client, url, params={**params, "pageNumber": page_number})
+            pages[page_number] = page.get("items", [])
+            if on_page:
+                on_page(page_number, pages[page_number])
+
+        await run_worker_pool(range(2, total_pages + 1), fetch_page)
+        # pages complete in any order
+        for page_number in sorted(pages):
+            items.extend(pages[page_number])
+        return items
+
+    # No totals in the envelope: keep a few pages in flight until a short page shows up
+    in_flight: Dict[int, asyncio.Task] = {}
+    next_page = 2
+
+    def schedule_next_page() -> None:
+        nonlocal next_page
+        in_flight[next_page] = asyncio.create_task(
+            fetch_json(client, url, params={**params, "pageNumber": next_page}))
+        next_page += 1
+
+    try:
+        for _ in range(PAGE_PREFETCH):
+            schedule_next_page()
+
+        page_number = 2
+        while True:
+            page_items = (await in_flight.pop(page_number)).get("items", [])
+            items.extend(page_items)
+            if on_page:
+                on_page(page_number, page_items)
+            if len(page_items) < page_size:
+                break
+            page_number += 1
+            schedule_next_page()
+    finally:
+        for task in in_flight.values():
+            task.cancel()
+        # Collect the cancelled or failed prefetches so none of them is left unretrieved
+        await asyncio.gather(*in_flight.values(), return_exceptions=True)
+
+    return items
+
+
 async def fetch_all_forms(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
-    url = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}/forms")
-    params = {"pageNumber": 1, "pageSize": 100, "dataSource": "Coalition"}
-    resp = await client.get(url, params=params)
-    resp.raise_for_status()
-    data = resp.json()
-    forms = [item for item in data.get("items", []) if item.get("status") != "Drafted"]
-    
+    url = f"{ELECTION_ROUND_URL}/forms"
+    forms = [item for item in await fetch_all_paginated(client, url) if item.get("status") != "Drafted"]
 
     # temp workaround to fetch form details for PSI
-    forms.append({"id":'d4a0c5ca-4dbd-47c0-8854-ba8cb2adbe10'})
+    forms.append({"id": 'd4a0c5ca-4dbd-47c0-8854-ba8cb2adbe10'})
 
     return forms
 
 
-async def fetch_quick_report_detail(client: httpx.AsyncClient, quick_report_id: str, sem: asyncio.Semaphore, progress,
-                                    task) -> Dict[str, Any]:
-    url = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}/quick-reports/{quick_report_id}")
-    async with sem:
-        try:
-            quick_report = await fetch_json(client, url)
-            progress.update(task, advance=1)
-            return quick_report
-        except Exception as e:
-            error_console.log(f"Failed to download submission {quick_report_id}: {e}")
-
-
 async def fetch_all_form_submissions(client: httpx.AsyncClient) -> List[
     Dict[str, Any]]:
-    url = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}/form-submissions:byEntry")
-
-    page_number = 1
-    page_size = 100
-    form_submissions: List[Dict[str, Any]] = []
-    while True:
-        params = {"pageNumber": page_number, "pageSize": page_size, "dataSource": "Coalition"}
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-        items = data.get("items", [])
-        form_submissions.extend(items)
-        if len(items) < page_size:
-            break
-        page_number += 1
-    return form_submissions
-
-
-async def fetch_all_quick_reports(client: httpx.AsyncClient) -> List[
+    url = f"{ELECTION_ROUND_URL}/form-submissions:byEntry"
+    return await fetch_all_paginated(client, url)
+
+
+async def fetch_all_quick_reports(client: httpx.AsyncClient, on_page: Optional[PageCallback] = None) -> List[
     Dict[str, Any]]:
-    url = urljoin(BASE_API_URL, f"/api/election-rounds/{ELECTION_ID}/quick-reports")
-
-    page_number = 1
-    page_size = 100
-    quick_reports: List[Dict[str, Any]] = []
-    while True:
-        params = {"pageNumber": page_number, "pageSize": page_size, "dataSource": "Coalition"}
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-        items = data.get("items", [])
-        quick_reports.extend(items)
-        if len(items) < page_size:
-            break
-        page_number += 1
-    return quick_reports
-
-
-def get_question_answer(question, answers, attachments_by_question, notes_by_question,
-                        default_language):
-    question_id = question["id"]
-    answer = next((a for a in answers if a["questionId"] == question_id), {})
-    notes = "\n\n\n".join(notes_by_question.get(question_id, []))
-    attachments = "\n\n".join(attachments_by_question.get(question_id, []))
-    has_free_text_option = any(
-        opt.get("isFreeText", False)
-        for opt in question.get("options", [])
-    )
+    url = f"{ELECTION_ROUND_URL}/quick-reports"
+    return await fetch_all_paginated(client, url, on_page)
 
-    question_type = question.get("$questionType", "")
-    if question_type == "textQuestion":
-        if not answer or not answer.get("text"):
-            return ["", notes, attachments]
-        else:
-            return [answer["text"], notes, attachments]
-    if question_type == "numberQuestion":
-        if not answer or not answer.get("value"):
-            return ["", notes, attachments]
-        else:
-            return [answer["value"], notes, attachments]
-    if question_type == "dateQuestion":
-        if not answer or not answer.get("date"):
-            return ["", notes, attachments]
-        else:
-            date = datetime.fromisoformat(answer["date"].replace("Z", "+00:00"))
-            return [date.strftime("%Y-%m-%d %H:%M"), notes, attachments]
-    if question_type == "singleSelectQuestion":
-        if not answer or not answer.get("selection"):
-            if has_free_text_option:
-                return ["", "", notes, attachments]
-            else:
-                return ["", notes, attachments]
-        else:
-            option = next(
-                (o for o in question["options"]
-                 if o["id"] == answer["selection"]["optionId"]),
-                None
-            )
-            selection = option["text"][default_language] if option else ""
-            if has_free_text_option:
-                return [selection, answer["selection"].get("text", ""), notes, attachments]
-            else:
-                return [selection, notes, attachments]
-    if question_type == "multiSelectQuestion":
-        if not answer or not answer.get("selection"):
-            if has_free_text_option:
-                return ["", "", notes, attachments]
-            else:
-                return ["", notes, attachments]
-        else:
-            # Build selection strings robustly
-            sel_texts = []
-            for sel in answer["selection"]:
-                opt_id = sel.get("optionId")
-                if not opt_id:
-                    continue
-                opt = next((o for o in question["options"] if o["id"] == opt_id), None)
-                if opt:
-                    sel_texts.append(opt["text"][default_language])
-            selection = ", ".join(sel_texts)
-            if has_free_text_option:
-                return [selection, ", ".join(sel.get("text", "") for sel in answer["selection"] if sel.get("text")),
-                        notes, attachments]
-            else:
-                return [selection, notes, attachments]
-    if question_type == "ratingQuestion":
-        if not answer or not answer.get("value"):
-            return ["", notes, attachments]
-        else:
-            return [answer["value"], notes, attachments]
+
+# ---------------------------
+# Question answers, one handler per question type
+# ---------------------------
+Answer = Optional[Dict[str, Any]]
+OptionsById = Dict[str, Dict[str, Any]]
+
+
+def text_question_answer(answer: Answer, notes: str, attachments: str, options_by_id: OptionsById,
+                         default_language: str, has_free_text_option: bool) -> List[Any]:
+    if not answer or not answer.get("text"):
+        return ["", notes, attachments]
+    return [answer["text"], notes, attachments]
+
+
+def value_question_answer(answer: Answer, notes: str, attachments: str, options_by_id: OptionsById,
+                          default_language: str, has_free_text_option: bool) -> List[Any]:
+    if not answer or not answer.get("value"):
+        return ["", notes, attachments]
+    return [answer["value"], notes, attachments]
+
+
+def date_question_answer(answer: Answer, notes: str, attachments: str, options_by_id: OptionsById,
+                         default_language: str, has_free_text_option: bool) -> List[Any]:
+    if not answer or not answer.get("date"):
+        return ["", notes, attachments]
+    date = parse_utc_timestamp(answer["date"])
+    return [date.strftime("%Y-%m-%d %H:%M"), notes, attachments]
+
+
+def single_select_question_answer(answer: Answer, notes: str, attachments: str, options_by_id: OptionsById,
+                                  default_language: str, has_free_text_option: bool) -> List[Any]:
+    if not answer or not answer.get("selection"):
+        if has_free_text_option:
+            return ["", "", notes, attachments]
+        return ["", notes, attachments]
+
+    option = options_by_id.get(answer["selection"]["optionId"])
+    selection = option["text"][default_language] if option else ""
+    if has_free_text_option:
+        return [selection, answer["selection"].get("text", ""), notes, attachments]
+    return [selection, notes, attachments]
+
+
+def multi_select_question_answer(answer: Answer, notes: str, attachments: str, options_by_id: OptionsById,
+                                 default_language: str, has_free_text_option: bool) -> List[Any]:
+    if not answer or not answer.get("selection"):
+        if has_free_text_option:
+            return ["", "", notes, attachments]
+        return ["", notes, attachments]
+
+    # Build selection strings robustly
+    sel_texts = []
+    for sel in answer["selection"]:
+        opt_id = sel.get("optionId")
+        if not opt_id:
+            continue
+        opt = options_by_id.get(opt_id)
+        if opt:
+            sel_texts.append(opt["text"][default_language])
+    selection = ", ".join(sel_texts)
+    if has_free_text_option:
+        return [selection, ", ".join([sel["text"] for sel in answer["selection"] if sel.get("text")]),
+                notes, attachments]
+    return [selection, notes, attachments]
+
+
+def unknown_question_answer(answer: Answer, notes: str, attachments: str, options_by_id: OptionsById,
+                            default_language: str, has_free_text_option: bool) -> List[Any]:
     return ["unknown value", notes, attachments]
 
-def map_submission_follow_up_status(follow_up_status):
-    status_map = {
-        "NotApplicable": "Not Applicable",
-        "NeedsFollowUp": "Needs Follow-up",
-        "Resolved": "Resolved",
-    }
-
-    return status_map.get(follow_up_status, follow_up_status)
-
-def map_quick_report_incident_category(incident_category):
-    incident_category_map = {
-      "PhysicalViolenceIntimidationPressure": "Physical violence/intimidation/pressure",
-      "CampaigningAtPollingStation": "Campaigning at the polling station",
-      "RestrictionOfObserversRights": "Restriction of observer's (representative's/media) rights",
-      "UnauthorizedPersonsAtPollingStation": "Unauthorized person(s) at the polling station",
-      "ViolationDuringVoterVerificationProcess": "Violation during voter verification process",
-      "VotingWithImproperDocumentation": "Voting with improper documentation",
-      "IllegalRestrictionOfVotersRightToVote": "Illegal restriction of voter's right to vote",
-      "DamagingOrSeizingElectionMaterials": "Damaging of/seizing election materials",
-      "ImproperFilingOrHandlingOfElectionDocumentation": "Improper filing/handling of election documentation",
-      "BallotStuffing": "Ballot stuffing",
-      "ViolationsRelatedToControlPaper": "Violations related to the control paper",
-      "NotCheckingVoterIdentificationSafeguardMeasures": "Not checking the voter identification safeguard measures",
-      "VotingWithoutVoterIdentificationSafeguardMeasures": "Voting without voter identification safeguard measures",
-      "BreachOfSecrecyOfVote": "Breach of secrecy of vote",
-      "ViolationsRelatedToMobileBallotBox": "Violations related to the mobile ballot box",
-      "NumberOfBallotsExceedsNumberOfVoters": "Number of ballots exceed the number of voters",
-      "ImproperInvalidationOrValidationOfBallots": "Improper invalidation / validation of ballots",
-      "FalsificationOrImproperCorrectionOfFinalProtocol": "Falsification / improper correction of the final protocol",
-      "RefusalToIssueCopyOfFinalProtocolOrIssuingImproperCopy": "Refusal to issue a copy of the final protocol/issuing an improper copy",
-      "ImproperFillingInOfFinalProtocol": "Improper filling in of the final protocol",
-      "ViolationOfSealingProceduresOfElectionMaterials": "Violation of the sealing procedures of the election materials",
-      "ViolationsRelatedToVoterLists": "Violations related to the voter lists",
-      "Other": "Other"
-    }
-
-    return incident_category_map.get(incident_category, incident_category)
-
-def map_quick_report_location_type(location_type):
-    location_type_map = {
-      "NotRelatedToAPollingStation": "Not Related To A Polling Station",
-      "OtherPollingStation": "Other Polling Station",
-      "VisitedPollingStation": "Visited Polling Station"
-    }
-
-    return location_type_map.get(location_type, location_type)
-
-def submissions_to_data_table(forms: List[Dict[str, Any]], submissions: List[Dict[str, Any]]):
-    default_headers = [
-        "SubmissionId",
-        "TimeSubmitted",
-        "FollowUpStatus",
-        "Level1",
-        "Level2",
-        "Level3",
-        "Level4",
-        "Level5",
-        "Number",
-        "MonitoringObserverId",
-        "Name",
-        "Email",
-        "PhoneNumber"
+
+QUESTION_ANSWER_HANDLERS = {
+    "textQuestion": text_question_answer,
+    "numberQuestion": value_question_answer,
+    "dateQuestion": date_question_answer,
+    "singleSelectQuestion": single_select_question_answer,
+    "multiSelectQuestion": multi_select_question_answer,
+    "ratingQuestion": value_question_answer,
+}
+
+
+FOLLOW_UP_STATUS_MAP = {
+    "NotApplicable": "Not Applicable",
+    "NeedsFollowUp": "Needs Follow-up",
+    "Resolved": "Resolved",
+}
+
+
+def map_submission_follow_up_status(follow_up_status: str) -> str:
+    return FOLLOW_UP_STATUS_MAP.get(follow_up_status, follow_up_status)
+
+
+INCIDENT_CATEGORY_MAP = {
+    "PhysicalViolenceIntimidationPressure": "Physical violence/intimidation/pressure",
+    "CampaigningAtPollingStation": "Campaigning at the polling station",
+    "RestrictionOfObserversRights": "Restriction of observer's (representative's/media) rights",
+    "UnauthorizedPersonsAtPollingStation": "Unauthorized person(s) at the polling station",
+    "ViolationDuringVoterVerificationProcess": "Violation during voter verification process",
+    "VotingWithImproperDocumentation": "Voting with improper documentation",
+    "IllegalRestrictionOfVotersRightToVote": "Illegal restriction of voter's right to vote",
+    "DamagingOrSeizingElectionMaterials": "Damaging of/seizing election materials",
+    "ImproperFilingOrHandlingOfElectionDocumentation": "Improper filing/handling of election documentation",
+    "BallotStuffing": "Ballot stuffing",
+    "ViolationsRelatedToControlPaper": "Violations related to the control paper",
+    "NotCheckingVoterIdentificationSafeguardMeasures": "Not checking the voter identification safeguard measures",
+    "VotingWithoutVoterIdentificationSafeguardMeasures": "Voting without voter identification safeguard measures",
+    "BreachOfSecrecyOfVote": "Breach of secrecy of vote",
+    "ViolationsRelatedToMobileBallotBox": "Violations related to the mobile ballot box",
+    "NumberOfBallotsExceedsNumberOfVoters": "Number of ballots exceed the number of voters",
+    "ImproperInvalidationOrValidationOfBallots": "Improper invalidation / validation of ballots",
+    "FalsificationOrImproperCorrectionOfFinalProtocol": "Falsification / improper correction of the final protocol",
+    "RefusalToIssueCopyOfFinalProtocolOrIssuingImproperCopy": "Refusal to issue a copy of the final protocol/issuing an improper copy",
+    "ImproperFillingInOfFinalProtocol": "Improper filling in of the final protocol",
+    "ViolationOfSealingProceduresOfElectionMaterials": "Violation of the sealing procedures of the election materials",
+    "ViolationsRelatedToVoterLists": "Violations related to the voter lists",
+    "Other": "Other"
+}
+
+
+def map_quick_report_incident_category(incident_category: str) -> str:
+    return INCIDENT_CATEGORY_MAP.get(incident_category, incident_category)
+
+
+LOCATION_TYPE_MAP = {
+    "NotRelatedToAPollingStation": "Not Related To A Polling Station",
+    "OtherPollingStation": "Other Polling Station",
+    "VisitedPollingStation": "Visited Polling Station"
+}
+
+
+def map_quick_report_location_type(location_type: str) -> str:
+    return LOCATION_TYPE_MAP.get(location_type, location_type)
+
+
+SUBMISSION_DEFAULT_HEADERS = [
+    "SubmissionId",
+    "TimeSubmitted",
+    "FollowUpStatus",
+    "Level1",
+    "Level2",
+    "Level3",
+    "Level4",
+    "Level5",
+    "Number",
+    "MonitoringObserverId",
+    "Name",
+    "Email",
+    "PhoneNumber"
+]
+
+
+def form_to_sheet(form: Dict[str, Any]) -> Dict[str, Any]:
+    form_headers = list(SUBMISSION_DEFAULT_HEADERS)
+    default_language = form["defaultLanguage"]
+
+    # Resolve the answer handler and option lookups once per question
+    question_handlers: List[Tuple[str, Callable[..., List[Any]], OptionsById, bool]] = []
+    for question in form["questions"]:
+        question_type = question.get("$questionType", "")
+        options = question.get("options", [])
+        has_free_text_option = any(opt.get("isFreeText", False) for opt in options)
+
+        form_headers.append(f"{question['code']} - {question['text'][default_language]}")
+        if question_type in ("singleSelectQuestion", "multiSelectQuestion") and has_free_text_option:
+            form_headers.append("FreeText")
+        form_headers.append("Notes")
+        form_headers.append("Attachments")
+
+        question_handlers.append((
+            question["id"],
+            QUESTION_ANSWER_HANDLERS.get(question_type, unknown_question_answer),
+            {opt["id"]: opt for opt in options},
+            has_free_text_option,
+        ))
+
+    # rows are (timeSubmitted, listing index, row_data) triples, sorted once all submissions are in
+    return {"form": form, "name": form["name"][default_language], "headers": form_headers,
+            "row_width": len(form_headers), "question_handlers": question_handlers, "rows": []}
+
+
+def submission_to_row(form_sheet: Dict[str, Any], fs: Dict[str, Any]) -> List[str]:
+    default_language: str = form_sheet["form"]["defaultLanguage"]
+    timeSubmitted_utc = parse_utc_timestamp(fs.get("timeSubmitted", ""))
+
+    # Convert from UTC to specified timezone
+    timeSubmitted = timeSubmitted_utc.astimezone(ZONE_INFO).strftime(TIMESTAMP_FORMAT)
+    # One allocation per row, filled in place
+    row_data: List[Any] = [""] * form_sheet["row_width"]
+    row_data[:len(SUBMISSION_DEFAULT_HEADERS)] = [
+        fs.get("submissionId", ""),
+        timeSubmitted,
+        map_submission_follow_up_status(fs.get("followUpStatus", "")),
+        fs.get("level1", ""),
+        fs.get("level2", ""),
+        fs.get("level3", ""),
+        fs.get("level4", ""),
+        fs.get("level5", ""),
+        fs.get("number", ""),
+        fs.get("monitoringObserverId", ""),
+        fs.get("observerName", ""),
+        fs.get("email", ""),
+        fs.get("phoneNumber", "")
     ]
 
-    forms_data = {}
-    forms.sort(
-        key=lambda f: (
-            0 if f["name"][f["defaultLanguage"]].strip().lower() == "psi" else 1,
-            f["name"][f["defaultLanguage"]].strip().lower()
+    attachments_by_question: Dict[str, List[str]] = defaultdict(list)
+    for attachment in fs.get("attachments", []):
+        attachments_by_question[attachment["questionId"]].append(attachment["presignedUrl"])
+
+    notes_by_question: Dict[str, List[str]] = defaultdict(list)
+    for note in fs.get("notes", []):
+        notes_by_question[note["questionId"]].append(note["text"])
+
+    answers_by_qid: Dict[str, Dict[str, Any]] = {a["questionId"]: a for a in fs.get("answers", [])}
+    col_idx = len(SUBMISSION_DEFAULT_HEADERS)
+    for question_id, handler, options_by_id, has_free_text_option in form_sheet["question_handlers"]:
+        # Most questions have neither notes nor attachments, skip the join for those
+        question_notes = notes_by_question.get(question_id)
+        notes = "\n\n\n".join(question_notes) if question_notes else ""
+        question_attachments = attachments_by_question.get(question_id)
+        attachments = "\n\n".join(question_attachments) if question_attachments else ""
+        cells = handler(answers_by_qid.get(question_id), notes, attachments, options_by_id,
+                        default_language, has_free_text_option)
+        row_data[col_idx:col_idx + len(cells)] = cells
+        col_idx += len(cells)
+
+    # Converted once here, the Excel and Google Sheets writers use the rows as they are
+    return to_cell_strings(row_data)
+
+
+def form_sheets_to_data_table(form_sheets: List[Dict[str, Any]]) -> Dict[str, List[List[Any]]]:
+    forms_data: Dict[str, List[List[Any]]] = {}
+    # Runs in a worker thread, so it sorts copies instead of the lists it was given
+    sorted_form_sheets = sorted(
+        form_sheets,
+        key=lambda fs: (
+            0 if fs["name"].strip().lower() == "psi" else 1,
+            fs["name"].strip().lower()
         )
     )
 
-    for idx, form in enumerate(forms, start=1):
-        form_headers = list(default_headers)
-
-        for question in form["questions"]:
-            form_headers.append(f"{question['code']} - {question['text'][form['defaultLanguage']]}")
-            if question.get("$questionType") in ("singleSelectQuestion", "multiSelectQuestion") and any(
-                    opt.get("isFreeText") for opt in question.get("options", [])):
-                form_headers.append("FreeText")
-            form_headers.append("Notes")
-            form_headers.append("Attachments")
-
-        form_submissions = [sub for sub in submissions if sub.get("formId") == form.get("id")]
-        form_submissions.sort(key=lambda x: x.get("timeSubmitted", ""))
-
-        data = [form_headers]
-        for fs in form_submissions:
-            timeSubmitted_utc = datetime.fromisoformat(fs.get("timeSubmitted", "").replace("Z", "+00:00"))
-
-            # Convert from UTC to specified timezone
-            timeSubmitted = timeSubmitted_utc.astimezone(ZONE_INFO).strftime("%Y-%m-%d %H:%M:%S")
-            row_data = [
-                fs.get("submissionId", ""),
-                timeSubmitted,
-                map_submission_follow_up_status(fs.get("followUpStatus", "")),
-                fs.get("level1", ""),
-                fs.get("level2", ""),
-                fs.get("level3", ""),
-                fs.get("level4", ""),
-                fs.get("level5", ""),
-                fs.get("number", ""),
-                fs.get("monitoringObserverId", ""),
-                fs.get("observerName", ""),
-                fs.get("email", ""),
-                fs.get("phoneNumber", "")
-            ]
-
-            attachments_by_question = defaultdict(list)
-            for attachment in fs.get("attachments", []):
-                attachments_by_question[attachment["questionId"]].append(attachment["presignedUrl"])
-
-            notes_by_question = defaultdict(list)
-            for note in fs.get("notes", []):
-                notes_by_question[note["questionId"]].append(note["text"])
-
-            for question in form["questions"]:
-                answers = fs.get("answers", [])
-                row = get_question_answer(question, answers, attachments_by_question, notes_by_question,
-                                          form["defaultLanguage"])
-                row_data.extend(row)
-
-            data.append(row_data)
+    # Numbered over every listed form, so sheet names stay stable between runs
+    # Forms without submissions keep a header-only sheet, the writers decide what to do with it
+    for idx, form_sheet in enumerate(sorted_form_sheets, start=1):
+        data = [form_sheet["headers"]]
+        data.extend(row_data for _, _, row_data in sorted(form_sheet["rows"], key=lambda r: (r[0], r[1])))
 
         sheet_name = clean_sheet_name(
-            f"{idx}_PSI" if form["formType"] == 'PSI'
-            else f"{idx}_{form['name'][form['defaultLanguage']]}"
+            f"{idx}_PSI" if form_sheet["form"]["formType"] == 'PSI'
+            else f"{idx}_{form_sheet['name']}"
         )
 
         forms_data[sheet_name] = data
     return forms_data
 
 
-def quick_reports_to_data_table(quick_reports):
-    data_table = [[
-        "QuickReportId",
-        "TimeSubmitted",
-        "FollowUpStatus",
-        "IncidentCategory",
-        "MonitoringObserverId",
-        "Name",
-        "Email",
-        "PhoneNumber",
-        "LocationType",
-        "Level1",
-        "Level2",
-        "Level3",
-        "Level4",
-        "Level5",
-        "LevelNumber",
-        "PollingStationDetails",
-        "Title",
-        "Description",
-        "Attachments",
-    ]]
-    quick_reports.sort(key=lambda x: x.get("timestamp", ""))
-
-    for qr in quick_reports:
-        attachments = "\n\n".join(map(lambda a: a["presignedUrl"], qr.get("attachments", [])))
-        timeSubmitted_utc = datetime.fromisoformat(qr.get("timestamp", "").replace("Z", "+00:00"))
-
-        # Convert from UTC to specified timezone
-        timeSubmitted = timeSubmitted_utc.astimezone(ZONE_INFO).strftime("%Y-%m-%d %H:%M:%S")
-        row_data = [
-            qr.get("id", ""),
-            timeSubmitted,
-            map_submission_follow_up_status(qr.get("followUpStatus", "")),
-            map_quick_report_incident_category(qr.get("incidentCategory", "")),
-            qr.get("monitoringObserverId", ""),
-            qr.get("name", ""),
-            qr.get("email", ""),
-            qr.get("phoneNumber", ""),
-            map_quick_report_location_type(qr.get("quickReportLocationType", "")),
-            qr.get("level1", ""),
-            qr.get("level2", ""),
-            qr.get("level3", ""),
-            qr.get("level4", ""),
-            qr.get("level5", ""),
-            qr.get("levelNumber", ""),
-            qr.get("pollingStationDetails", ""),
-            qr.get("title", ""),
-            qr.get("description", ""),
-            attachments
-        ]
-        data_table.append(row_data)
+QUICK_REPORT_HEADERS = [
+    "QuickReportId",
+    "TimeSubmitted",
+    "FollowUpStatus",
+    "IncidentCategory",
+    "MonitoringObserverId",
+    "Name",
+    "Email",
+    "PhoneNumber",
+    "LocationType",
+    "Level1",
+    "Level2",
+    "Level3",
+    "Level4",
+    "Level5",
+    "LevelNumber",
+    "PollingStationDetails",
+    "Title",
+    "Description",
+    "Attachments",
+]
+
+
+def quick_report_to_row(qr: Dict[str, Any]) -> List[str]:
+    attachments = "\n\n".join(map(lambda a: a["presignedUrl"], qr.get("attachments", [])))
+    timeSubmitted_utc = parse_utc_timestamp(qr.get("timestamp", ""))
+
+    # Convert from UTC to specified timezone
+    timeSubmitted = timeSubmitted_utc.astimezone(ZONE_INFO).strftime(TIMESTAMP_FORMAT)
+    row_data = [
+        qr.get("id", ""),
+        timeSubmitted,
+        map_submission_follow_up_status(qr.get("followUpStatus", "")),
+        map_quick_report_incident_category(qr.get("incidentCategory", "")),
+        qr.get("monitoringObserverId", ""),
+        qr.get("name", ""),
+        qr.get("email", ""),
+        qr.get("phoneNumber", ""),
+        map_quick_report_location_type(qr.get("quickReportLocationType", "")),
+        qr.get("level1", ""),
+        qr.get("level2", ""),
+        qr.get("level3", ""),
+        qr.get("level4", ""),
+        qr.get("level5", ""),
+        qr.get("levelNumber", ""),
+        qr.get("pollingStationDetails", ""),
+        qr.get("title", ""),
+        qr.get("description", ""),
+        attachments
+    ]
+    return to_cell_strings(row_data)
 
-    return data_table
 
+def quick_reports_to_data_table(rows: List[Tuple[str, Tuple[int, int], List[str]]]) -> List[List[str]]:
+    # Runs in a worker thread, so it sorts a copy instead of the list it was given
+    data_table = [QUICK_REPORT_HEADERS]
+    data_table.extend(row_data for _, _, row_data in sorted(rows, key=lambda r: (r[0], r[1])))
+    return data_table
 
-async def write_submissions_to_excel(forms_data):
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    filename = f"form_submissions_{timestamp}.xlsx"
-    path = os.path.join(EXPORT_ROOT, filename)
 
-    workbook = xlsxwriter.Workbook(path)
+def _build_xlsx(path, sheets_data):
+    # Rows are flushed to disk as they are written; cells are already plain strings,
+    # so skip xlsxwriter's url/number/formula detection on every cell
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "strings_to_urls": False,
+        "strings_to_numbers": False,
+        "strings_to_formulas": False,
+    })
 
-    for sheet_name, data in forms_data.items():
-        form_worksheet = workbook.add_worksheet(sheet_name)
+    for sheet_name, data in sheets_data.items():
+        worksheet = workbook.add_worksheet(sheet_name)
 
         # write data
         for row_idx, row_data in enumerate(data):
-            for col_idx, cell_value in enumerate(row_data):
-                form_worksheet.write_string(row_idx, col_idx, str(cell_value or ""))
+            worksheet.write_row(row_idx, 0, row_data)
 
     workbook.close()
 
 
-async def write_quick_reports_to_excel(quick_reports):
+async def write_submissions_to_excel(forms_data):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    filename = f"quick-reports-{timestamp}.xlsx"
+    filename = f"form_submissions_{timestamp}.xlsx"
     path = os.path.join(EXPORT_ROOT, filename)
 
-    workbook = xlsxwriter.Workbook(path)
+    # Forms without submissions get no sheet in a fresh workbook
+    sheets_with_rows = {sheet_name: data for sheet_name, data in forms_data.items() if len(data) > 1}
 
-    quick_reports_worksheet = workbook.add_worksheet("Quick Reports")
+    # xlsxwriter is synchronous, keep it off the event loop
+    await asyncio.to_thread(_build_xlsx, path, sheets_with_rows)
 
-    # write data
-    for row_idx, row_data in enumerate(quick_reports):
-        for col_idx, cell_value in enumerate(row_data):
-            quick_reports_worksheet.write_string(row_idx, col_idx, str(cell_value or ""))
 
-    workbook.close()
+async def write_quick_reports_to_excel(quick_reports):
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    filename = f"quick-reports-{timestamp}.xlsx"
+    path = os.path.join(EXPORT_ROOT, filename)
 
+    # xlsxwriter is synchronous, keep it off the event loop
+    await asyncio.to_thread(_build_xlsx, path, {"Quick Reports": quick_reports})
 
-async def write_submissions_to_google_spreadsheet(progress, task_upload_forms, forms_data):
+
+def _upload_submissions_to_google_spreadsheet(gdocs_client, progress, task_upload_forms, forms_data):
     workbook = gdocs_client.open_by_key(FS_GOOGLE_DOC_ID)
 
+    # One metadata fetch for all worksheets instead of one lookup per sheet
+    existing_sheets = {worksheet.title for worksheet in workbook.worksheets()}
+
+    sheets_to_clear = []
+    sheets_to_add = []
+    sheets_to_write = {}
     for sheet_name, data in forms_data.items():
-        # Try to get existing worksheet or create a new one
-        try:
-            worksheet = workbook.worksheet(sheet_name)
-            worksheet.clear()
-        except gspread.exceptions.WorksheetNotFound:
+        # Existing worksheets get cleared, missing ones are created unless the form has no submissions
+        if sheet_name in existing_sheets:
+            sheets_to_clear.append(absolute_range_name(sheet_name))
+        elif len(data) > 1:
             num_rows = max(1000, len(data))
             num_cols = max(1, len(data[0]) if data else 1)
-            worksheet = workbook.add_worksheet(title=sheet_name, rows=num_rows, cols=num_cols)
-
-        # Convert all cells to strings
-        values = [[str(cell or "") for cell in row] for row in data]
-
-        worksheet.update(range_name="A1", values=values)
-        progress.update(task_upload_forms, advance=1)
-
-async def write_quick_reports_to_google_spreadsheet(quick_reports):
+            sheets_to_add.append({"addSheet": {"properties": {
+                "title": sheet_name,
+                "gridProperties": {"rowCount": num_rows, "columnCount": num_cols},
+            }}})
+        else:
+            continue
+        sheets_to_write[sheet_name] = data
+
+    # One API call per operation instead of one per worksheet
+    if sheets_to_clear:
+        workbook.values_batch_clear(body={"ranges": sheets_to_clear})
+    if sheets_to_add:
+        workbook.batch_update({"requests": sheets_to_add})
+    if sheets_to_write:
+        workbook.values_batch_update(body={
+            "valueInputOption": "RAW",
+            "data": [
+                {
+                    "range": absolute_range_name(sheet_name, "A1"),
+                    "values": data,
+                }
+                for sheet_name, data in sheets_to_write.items()
+            ],
+        })
+    progress.update(task_upload_forms, advance=len(forms_data))
+
+
+async def write_submissions_to_google_spreadsheet(gdocs_client, progress, task_upload_forms, forms_data):
+    # gspread does blocking HTTP, keep it off the event loop
+    await asyncio.to_thread(_upload_submissions_to_google_spreadsheet, gdocs_client, progress, task_upload_forms,
+                            forms_data)
+
+async def write_quick_reports_to_google_spreadsheet(gdocs_client, quick_reports):
     workbook = gdocs_client.open_by_key(QR_GOOGLE_DOC_ID)
     sheet_name = "Quick Reports"
 
@@ -530,10 +852,7 @@ async def write_quick_reports_to_google_spreadsheet(quick_reports):
         num_rows = max(1000, len(quick_reports))
         worksheet = workbook.add_worksheet(title=sheet_name, rows=num_rows, cols=100)
 
-    # Convert all cells to strings
-    values = [[str(cell or "") for cell in row] for row in quick_reports]
-
-    worksheet.update(range_name="A1", values=values)
+    worksheet.update(range_name="A1", values=quick_reports)
 
 async def write_timestamp_to_google_spreadsheet(workbook, timestamp):
     sheet_name = "Status"
@@ -546,145 +865,159 @@ async def write_timestamp_to_google_spreadsheet(workbook, timestamp):
 
     worksheet.update_acell("B3", timestamp)
 
-async def download_submission_attachment_worker(attachment: Dict[str, Any], sem: asyncio.Semaphore, progress, task) -> None:
+async def download_submission_attachment_worker(client: httpx.AsyncClient, attachment: Dict[str, Any],
+                                                existing_files: Set[str], progress, task) -> None:
     path = local_submission_attachment_path(attachment)
-    async with sem:
-        try:
-            await download_binary(attachment["presignedUrl"], path)
-            progress.update(task, advance=1)
-        except Exception as e:
-            error_console.log(f"{e}")
+    if path in existing_files:
+        progress.update(task, advance=1)
+        return
 
-async def download_quick_report_attachment_worker(attachment: Dict[str, Any], sem: asyncio.Semaphore, progress, task) -> None:
+    try:
+        await download_binary(client, attachment["presignedUrl"], path)
+        existing_files.add(path)
+        progress.update(task, advance=1)
+    except Exception as e:
+        error_console.log(f"{e}")
+
+async def download_quick_report_attachment_worker(client: httpx.AsyncClient, attachment: Dict[str, Any],
+                                                  existing_files: Set[str], progress, task) -> None:
     path = local_quick_report_attachment_path(attachment)
-    async with sem:
-        try:
-            await download_binary(attachment["presignedUrl"], path)
-            progress.update(task, advance=1)
-        except Exception as e:
-            error_console.log(f"{e}")
+    if path in existing_files:
+        progress.update(task, advance=1)
+        return
+
+    try:
+        await download_binary(client, attachment["presignedUrl"], path)
+        existing_files.add(path)
+        progress.update(task, advance=1)
+    except Exception as e:
+        error_console.log(f"{e}")
 
 async def main():
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
+    # Authorized here rather than at import, importing the module touches neither disk nor network
+    credentials = Credentials.from_service_account_file(GOOGLE_CREDENTIALS_PATH, scopes=scopes)
+    gdocs_client = gspread.authorize(credentials)
+
+    # HTTP/2 multiplexes the many small API requests over a few connections,
+    # failed connection attempts are retried by the transport.
+    # TCP keepalive stops NATs and firewalls from silently dropping pooled connections while idle.
+    socket_options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    limits = httpx.Limits(max_connections=CONCURRENT_WORKERS * 4, max_keepalive_connections=CONCURRENT_WORKERS * 4,
+                          keepalive_expiry=HTTP_KEEPALIVE_SECONDS)
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=HTTP_RETRIES,
+                                         socket_options=socket_options)
+    # Attachments are presigned storage URLs, they get their own unauthenticated pool
+    attachments_limits = httpx.Limits(max_connections=CONCURRENT_WORKERS * 2,
+                                      max_keepalive_connections=CONCURRENT_WORKERS * 2,
+                                      keepalive_expiry=HTTP_KEEPALIVE_SECONDS)
+    attachments_transport = httpx.AsyncHTTPTransport(http2=True, limits=attachments_limits,
+                                                     socket_options=socket_options)
+    async with httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT_SECONDS) as client, \
+            httpx.AsyncClient(transport=attachments_transport,
+                              timeout=HTTP_TIMEOUT_SECONDS) as attachments_client:
         await log_in(client)
 
         with Progress(console=console, transient=True) as progress:
-            task_overall = progress.add_task("[cyan]Overall progress...", total=14)
+            task_overall = progress.add_task("[cyan]Overall progress...", total=13)
 
             # 1 Fetch submission list
             submissions_list = await fetch_all_form_submissions(client)
             progress.update(task_overall, advance=1)
 
-            # 2 Fetch submission details concurrently
-            sem_submissions = asyncio.Semaphore(CONCURRENT_WORKERS)
-
+            # 2 Fetch submission details and their forms concurrently, flattening each into rows as it arrives
             task_submissions = progress.add_task("[green]Fetching submissions...", total=len(submissions_list))
+            task_forms = progress.add_task("[green]Fetching form details...", total=0)
 
-            form_submissions_tasks = [
-                fetch_submission_detail(client, s["submissionId"], sem_submissions, progress, task_submissions)
-                for s in submissions_list
-            ]
-            form_submissions = [r for r in (await asyncio.gather(*form_submissions_tasks)) if r]
+            form_sheets, submission_attachments = await stream_submissions_to_sheets(
+                client, [s["submissionId"] for s in submissions_list], progress, task_submissions, task_forms)
             progress.update(task_overall, advance=1)
 
-            # 3 Fetch distinct forms
-            forms = await fetch_all_forms(client)
+            # 7-8 Fetch quick reports list and details in the background, behind the submission
+            # attachments and writes. Details are fetched as the listing pages come in.
+            async def fetch_quick_reports():
+                task_quick_reports = progress.add_task("[green]Fetching quick reports...", total=0)
+                result = await stream_quick_reports_to_rows(client, progress, task_quick_reports)
+                progress.update(task_overall, advance=2)
+                return result
 
-            task_forms = progress.add_task("[green]Fetching form details...", total=len(forms))
+            quick_reports_task = asyncio.create_task(fetch_quick_reports())
 
-            form_tasks = [fetch_form_detail(client, form.get("id"), progress, task_forms) for form in forms]
-            forms = [f for f in (await asyncio.gather(*form_tasks)) if f]
-            progress.update(task_overall, advance=1)
+            # 4 Form submissions to spreadsheets, built in a worker thread while the attachments download
+            submissions_sheets_task = asyncio.create_task(asyncio.to_thread(form_sheets_to_data_table, form_sheets))
 
-            # 4 Download forms submissions attachments
+            # 3 Download forms submissions attachments
             if DOWNLOAD_ATTACHMENTS:
-                sem_attach = asyncio.Semaphore(CONCURRENT_WORKERS)
-                attach_tasks = []
-                total_number_of_attachments = sum(
-                    len(submission.get("attachments", []))
-                    for submission in form_submissions
-                )
-
-                fs_attachments_task = progress.add_task("[green]Fetching form submissions attachments...", total=total_number_of_attachments)
-
-                for submission in form_submissions:
-                    for attachment in submission.get("attachments", []):
-                        attach_tasks.append(
-                            download_submission_attachment_worker(attachment, sem_attach, progress, fs_attachments_task))
-
-                _ = [r for r in (await asyncio.gather(*attach_tasks)) if r]
-            progress.update(task_overall, advance=1)
-
-            # 5 Form submissions to spreadsheets
-            submissions_sheets = submissions_to_data_table(forms, form_submissions)
-            progress.update(task_overall, advance=1)
-
-            # 6 Write form submissions to excel
-            await write_submissions_to_excel(submissions_sheets)
+                existing_files = list_exported_files()
+                for attachment_dir in {os.path.dirname(local_submission_attachment_path(a))
+                                       for a in submission_attachments}:
+                    os.makedirs(attachment_dir, exist_ok=True)
+
+                fs_attachments_task = progress.add_task("[green]Fetching form submissions attachments...",
+                                                        total=len(submission_attachments))
+
+                await run_worker_pool(
+                    submission_attachments,
+                    lambda attachment: download_submission_attachment_worker(
+                        attachments_client, attachment, existing_files, progress, fs_attachments_task))
             progress.update(task_overall, advance=1)
 
-            # 7 Write form submissions to Google Spreadsheets
-            task_upload_forms = progress.add_task("[green]Write form submissions to Google Spreadsheets...", total=len(forms))
-            await write_submissions_to_google_spreadsheet(progress, task_upload_forms, submissions_sheets)
+            submissions_sheets = await submissions_sheets_task
             progress.update(task_overall, advance=1)
 
-            # 8 Fetch quick reports list
-            quick_reports_list = await fetch_all_quick_reports(client)
-            progress.update(task_overall, advance=1)
+            # 5-6 Write form submissions to excel and Google Spreadsheets concurrently
+            task_upload_forms = progress.add_task("[green]Write form submissions to Google Spreadsheets...",
+                                                  total=len(submissions_sheets))
+            await asyncio.gather(
+                write_submissions_to_excel(submissions_sheets),
+                write_submissions_to_google_spreadsheet(gdocs_client, progress, task_upload_forms, submissions_sheets),
+            )
+            progress.update(task_overall, advance=2)
 
-            # 9 Fetch quick reports details concurrently
-            sem_quick_reports = asyncio.Semaphore(CONCURRENT_WORKERS)
+            quick_reports_rows, quick_report_attachments = await quick_reports_task
 
-            task_quick_reports = progress.add_task("[green]Fetching quick reports...", total=len(quick_reports_list))
+            # 10 Quick reports to spreadsheets, built in a worker thread while the attachments download
+            quick_reports_sheet_task = asyncio.create_task(
+                asyncio.to_thread(quick_reports_to_data_table, quick_reports_rows))
 
-            quick_reports_tasks = [
-                fetch_quick_report_detail(client, qr["id"], sem_quick_reports, progress, task_quick_reports)
-                for qr in quick_reports_list
-            ]
-            quick_reports_details = [r for r in (await asyncio.gather(*quick_reports_tasks)) if r]
-            progress.update(task_overall, advance=1)
-
-            # 10 Download quick reports attachments
+            # 9 Download quick reports attachments
             if DOWNLOAD_ATTACHMENTS:
-                sem_attach = asyncio.Semaphore(CONCURRENT_WORKERS)
-                attach_tasks = []
-                total_number_of_attachments = sum(
-                    len(qr.get("attachments", []))
-                    for qr in quick_reports_details
-                )
-
                 qr_attachments_task = progress.add_task("[green]Fetching quick reports attachments...",
-                                                        total=total_number_of_attachments)
+                                                        total=len(quick_report_attachments))
 
-                for quick_report in quick_reports_details:
-                    for attachment in quick_report.get("attachments", []):
-                        attach_tasks.append(
-                            download_quick_report_attachment_worker(attachment, sem_attach, progress, qr_attachments_task))
+                for attachment_dir in {os.path.dirname(local_quick_report_attachment_path(a))
+                                       for a in quick_report_attachments}:
+                    os.makedirs(attachment_dir, exist_ok=True)
 
-                _ = [r for r in (await asyncio.gather(*attach_tasks)) if r]
+                await run_worker_pool(
+                    quick_report_attachments,
+                    lambda attachment: download_quick_report_attachment_worker(
+                        attachments_client, attachment, existing_files, progress, qr_attachments_task))
 
             progress.update(task_overall, advance=1)
 
-            # 11 Quick reports to spreadsheets
-            quick_reports_sheet = quick_reports_to_data_table(quick_reports_details)
+            quick_reports_sheet = await quick_reports_sheet_task
             progress.update(task_overall, advance=1)
 
-            # 12 Write quick reports to excel
+            # 11 Write quick reports to excel
             await write_quick_reports_to_excel(quick_reports_sheet)
             progress.update(task_overall, advance=1)
 
-            # 13 Write quick reports to Google Spreadsheets
-            await write_quick_reports_to_google_spreadsheet(quick_reports_sheet)
+            # 12 Write quick reports to Google Spreadsheets
+            await write_quick_reports_to_google_spreadsheet(gdocs_client, quick_reports_sheet)
             progress.update(task_overall, advance=1)
 
             fs_workbook = gdocs_client.open_by_key(FS_GOOGLE_DOC_ID)
             qr_workbook = gdocs_client.open_by_key(QR_GOOGLE_DOC_ID)
 
-            timestamp = datetime.now(ZONE_INFO).strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = datetime.now(ZONE_INFO).strftime(TIMESTAMP_FORMAT)
             await write_timestamp_to_google_spreadsheet(fs_workbook, timestamp)
             await write_timestamp_to_google_spreadsheet(qr_workbook, timestamp)
             progress.update(task_overall, advance=1)
 
 
 if __name__ == "__main__":
+    # uvloop has no Windows support, fall back to the default event loop there
+    if sys.platform != "win32":
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())